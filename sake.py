@@ -1,13 +1,27 @@
 import argparse
+import heapq
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import json
+import operator
 import os
 from datetime import datetime
+from functools import cached_property
+import hashlib
+from itertools import chain, islice
 from dateutil import parser
-from functools import partial
 from pathlib import Path
+import pickle
+import re
+import shlex
 import subprocess
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from rich import box
 from rich.console import Console, RenderGroup
 from rich.table import Table
@@ -15,28 +29,93 @@ from rich.prompt import Confirm
 from rich.panel import Panel
 
 
+KEEPSAKE_CONFIG = "keepsake.yml"
+# per the XDG spec, an empty or relative XDG_CACHE_HOME is ignored
+CACHE_HOME = Path(os.environ.get("XDG_CACHE_HOME") or "~/.cache").expanduser()
+CACHE_DIR = (CACHE_HOME if CACHE_HOME.is_absolute() else Path.home() / ".cache") / "sake"
+# the only fields of the checkpoints used by sake, the others are dropped
+CHECKPOINT_FIELDS = ("step", "metrics", "primary_metric")
+# above this total size of files to parse, they are loaded in subprocesses
+PROCESS_POOL_MIN_BYTES = 64 * 1024 * 1024
+# longer params and metrics are trimmed when displayed
+MAX_VALUE_LENGTH = 60
+TRIMMED_VALUE_LENGTH = MAX_VALUE_LENGTH - 3
+# the cells of the list are plain text, skip markup parsing and highlighting
+LIST_CONSOLE = Console(highlight=False, markup=False, emoji=False)
+
+
+def loads_json(data):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN and Infinity, which diverged runs log
+            pass
+    return json.loads(data)
+
+
+def intern_keys(values):
+    if values is None:
+        return None
+    return {sys.intern(key): value for key, value in values.items()}
+
+
+def slim_checkpoints(checkpoints):
+    if checkpoints is None:
+        return None
+    return [
+        {field: checkpoint[field] for field in CHECKPOINT_FIELDS if field in checkpoint}
+        for checkpoint in checkpoints
+    ]
+
+
 class Experiment(object):
     def __init__(self, expe_json):
         self.id = expe_json["id"]
-        date, _ = expe_json["created"].split(".")
-        self.created = datetime.fromisoformat(date)
-        self.params = expe_json["params"]
-        self.checkpoints = expe_json["checkpoints"]
+        # only keep the fixed width YYYY-MM-DDTHH:MM:SS prefix, the fraction
+        # and timezone are dropped and would only slow fromisoformat down
+        self.created = datetime.fromisoformat(expe_json["created"][:19])
+        self.params = intern_keys(expe_json["params"])
+        self._checkpoints = slim_checkpoints(expe_json["checkpoints"])
+        self._checkpoints_json = None
+        self.n_checkpoints = 0 if self._checkpoints is None else len(self._checkpoints)
         self.command = expe_json["command"]
+        self._reset()
+
+    def _reset(self):
+        self._metrics_cache = {}
+        self._rendered = {}
+        # params, then the metrics of the best checkpoint once they are needed
+        self._field_index = dict(self.params or {})
+        self._indexed_best = False
+
+    @property
+    def checkpoints(self):
+        if self._checkpoints_json is not None:
+            # already slimmed before being cached
+            self._checkpoints = loads_json(self._checkpoints_json)
+            self._checkpoints_json = None
+        return self._checkpoints
 
     def get_field(self, field, default_val=None):
-        if field in self.params:
-            return self.params[field]
+        if field in self._field_index:
+            return self._field_index[field]
 
-        if self.checkpoints is None:
+        if self.n_checkpoints == 0:
             return default_val
-        _, best_checkpoint = self.get_best_checkpoint()
-        if field in best_checkpoint["metrics"]:
-            return best_checkpoint["metrics"][field]
+        if not self._indexed_best:
+            _, checkpoint = self.best_checkpoint
+            for key, value in checkpoint["metrics"].items():
+                self._field_index.setdefault(key, value)
+            self._indexed_best = True
+            if field in self._field_index:
+                return self._field_index[field]
 
         for checkpoint in self.checkpoints:
-            if field in checkpoint["metrics"]:
-                return checkpoint["metrics"][field]
+            metrics = checkpoint["metrics"]
+            if field in metrics:
+                value = self._field_index[field] = metrics[field]
+                return value
 
         return default_val
 
@@ -47,27 +126,31 @@ class Experiment(object):
 
         def maybe_trim(value: str):
             # TODO: trim after ":"
-            MAX_LENGTH = 60
-            if len(value) > MAX_LENGTH:
-                split_idx = max(MAX_LENGTH-3, value.index(":"))
-                value = value[:split_idx] + "..."
-            return value
+            if len(value) <= MAX_VALUE_LENGTH:
+                return value
+            split_idx = max(TRIMMED_VALUE_LENGTH, value.index(":"))
+            return value[:split_idx] + "..."
 
         if len(values) >= num_values:
-            values = values[:num_values+1] + ["..."]
+            values = chain(islice(values, num_values + 1), ["..."])
 
-        values = [maybe_trim(value) for value in values]
-        return "\n".join(values)
+        return "\n".join(map(maybe_trim, values))
 
     @staticmethod
     def _select(values, select):
         items = values.items()
-        if select is None or all([name not in values.keys() for name in select]):
+        if select is None or values.keys().isdisjoint(select):
             return items, False
-        
-        n_before = len(items)
-        items = list(filter(lambda x: x[0] in select, items))
-        return items, n_before != len(items)
+
+        select = frozenset(select)
+        items = [item for item in items if item[0] in select]
+        return items, len(items) != len(values)
+
+    @staticmethod
+    def _primary_first(items, name):
+        head = [item for item in items if item[0] == name]
+        tail = [item for item in items if item[0] != name]
+        return head + tail
 
     @staticmethod
     def _present_value(value):
@@ -76,28 +159,37 @@ class Experiment(object):
         return value
 
     def get_params(self, select=[], show_all=False):
-        items, _ = self._select(self.params, select)
-        values = [f"{key}: {self._present_value(value)}" for key, value in items]
-        return self._present(values, num_values=10000 if show_all else None)
+        cache_key = ("params", tuple(select or ()), show_all)
+        if cache_key not in self._rendered:
+            items, _ = self._select(self.params, select)
+            values = [f"{key}: {self._present_value(value)}" for key, value in items]
+            self._rendered[cache_key] = self._present(values, num_values=10000 if show_all else None)
+        return self._rendered[cache_key]
 
     def get_keys(self):
         metrics = self.get_metrics()
         return metrics.keys()
 
     def _get_metrics(self, select=[]):
-        if self.checkpoints is None:
+        if self.n_checkpoints == 0:
             return []
-        name, checkpoint = self.get_best_checkpoint()
-        items, selected = self._select(checkpoint["metrics"], select)
-        metrics = sorted(items, key=lambda x: -int(x[0] == name))
-        return metrics
+        key = None if select is None else tuple(select)
+        if key not in self._metrics_cache:
+            name, checkpoint = self.best_checkpoint
+            items, selected = self._select(checkpoint["metrics"], select)
+            self._metrics_cache[key] = self._primary_first(items, name)
+        return self._metrics_cache[key]
 
     def get_metrics(self, select=[], show_all=False):
-        if self.checkpoints is None:
+        if self.n_checkpoints == 0:
             return "0 checkpoints"
-        name, checkpoint = self.get_best_checkpoint()
+        cache_key = ("metrics", tuple(select or ()), show_all)
+        if cache_key in self._rendered:
+            return self._rendered[cache_key]
+
+        name, checkpoint = self.best_checkpoint
         items, selected = self._select(checkpoint["metrics"], select)
-        metrics = sorted(items, key=lambda x: -int(x[0] == name))
+        metrics = self._primary_first(items, name)
         step = checkpoint["step"]
         values = [f"step {step} (best)"] + [
             f"{key}: {self._present_value(value)}"
@@ -108,80 +200,211 @@ class Experiment(object):
             num_values = 10000
         elif selected:
             num_values = len(items)
-        return self._present(values, num_values=num_values)
+        self._rendered[cache_key] = self._present(values, num_values=num_values)
+        return self._rendered[cache_key]
 
     def get_best_checkpoint(self):
-        metrics = {}
-        for checkpoint in self.checkpoints:
-            primary_metric = checkpoint["primary_metric"]["name"]
-            primary_metric_goal = checkpoint["primary_metric"]["goal"]
-            if (primary_metric, primary_metric_goal) not in metrics:
-                metrics[(primary_metric, primary_metric_goal)] = 0
-            metrics[(primary_metric, primary_metric_goal)] += 1
-
-        (name, goal), _ = sorted(metrics.items(), key=lambda x: x[1])[-1]
-        metric_value = self.checkpoints[0]["metrics"][name]
-        checkpoint_idx = 0
-        for i, checkpoint in enumerate(self.checkpoints[1:]):
-            if goal == "maximize" and checkpoint["metrics"][name] > metric_value:
-                metric_value = checkpoint["metrics"][name]
-                checkpoint_idx = i + 1
-            elif goal == "minimize" and checkpoint["metrics"][name] < metric_value:
-                metric_value = checkpoint["metrics"][name]
-                checkpoint_idx = i + 1
-        return name, self.checkpoints[checkpoint_idx]
+        return self.best_checkpoint
+
+    @cached_property
+    def best_checkpoint(self):
+        best = self._scan_best_checkpoint(self.checkpoints)
+        if best is not None:
+            return best
+
+        metrics = Counter(
+            (checkpoint["primary_metric"]["name"], checkpoint["primary_metric"]["goal"])
+            for checkpoint in self.checkpoints
+        )
+        # on ties, the metric seen last wins
+        (name, goal), _ = max(reversed(metrics.items()), key=lambda x: x[1])
+        metric_value = lambda checkpoint: checkpoint["metrics"][name]
+        if goal == "maximize":
+            best_checkpoint = max(self.checkpoints, key=metric_value)
+        elif goal == "minimize":
+            best_checkpoint = min(self.checkpoints, key=metric_value)
+        else:
+            best_checkpoint = self.checkpoints[0]
+        return name, best_checkpoint
+
+    @staticmethod
+    def _scan_best_checkpoint(checkpoints):
+        # single pass for the usual case where all the checkpoints share
+        # the same primary metric, None otherwise
+        primary_metric = checkpoints[0]["primary_metric"]
+        name, goal = primary_metric["name"], primary_metric["goal"]
+        maximize, minimize = goal == "maximize", goal == "minimize"
+        best_checkpoint = checkpoints[0]
+        best_value = best_checkpoint["metrics"][name]
+        for checkpoint in checkpoints:
+            primary_metric = checkpoint["primary_metric"]
+            if primary_metric["name"] != name or primary_metric["goal"] != goal:
+                return None
+            if not (maximize or minimize):
+                continue
+            value = checkpoint["metrics"][name]
+            if (maximize and value > best_value) or (minimize and value < best_value):
+                best_checkpoint = checkpoint
+                best_value = value
+        return name, best_checkpoint
 
     def get_best_step(self):
-        _, checkpoint = self.get_best_checkpoint()
+        if self.n_checkpoints == 0:
+            return None
+        _, checkpoint = self.best_checkpoint
         return None if checkpoint is None else checkpoint["step"] 
 
     @staticmethod
     def from_file(file_path):
-        with open(file_path, "r") as f:
-            expe_json = json.load(f)
+        with open(file_path, "rb") as f:
+            expe_json = loads_json(f.read())
         return Experiment(expe_json)
 
+    def to_record(self):
+        # plain values only, so that the cache does not depend on how sake
+        # was imported. The checkpoints stay encoded until they are needed,
+        # with json rather than orjson which would turn NaN and Infinity
+        # into null
+        checkpoints_json = self._checkpoints_json
+        if checkpoints_json is None and self._checkpoints is not None:
+            checkpoints_json = json.dumps(self._checkpoints).encode()
+        return {
+            "id": self.id,
+            "created": self.created,
+            "params": self.params,
+            "checkpoints": checkpoints_json,
+            "n_checkpoints": self.n_checkpoints,
+            "command": self.command,
+        }
+
+    @staticmethod
+    def from_record(record):
+        expe = Experiment.__new__(Experiment)
+        expe.id = record["id"]
+        expe.created = record["created"]
+        expe.params = intern_keys(record["params"])
+        expe._checkpoints = None
+        expe._checkpoints_json = record["checkpoints"]
+        expe.n_checkpoints = record["n_checkpoints"]
+        expe.command = record["command"]
+        expe._reset()
+        return expe
+
+
+def load_record(file_path):
+    return Experiment.from_file(file_path).to_record()
+
 
 class KeepsakeRepository(object):
     def __init__(self):
         self.location = self._get_location()
 
-    def _get_experiments_files(self):
-        metadata_dir = self.location / "metadata/experiments"
-        experiment_files = os.listdir(metadata_dir)
-        return [
-            os.path.join(metadata_dir, experiment_file)
-            for experiment_file in experiment_files
-        ]
+    def _get_metadata_dir(self):
+        return os.path.abspath(self.location / "metadata/experiments")
 
     def get_experiments(self):
-        experiment_files = self._get_experiments_files()
-        experiments = [
-            Experiment.from_file(file_path)
-            for file_path in experiment_files
+        metadata_dir = self._get_metadata_dir()
+        cache_path = get_cache_path(metadata_dir)
+        cache = load_cache(cache_path)
+
+        keys = {}
+        with os.scandir(metadata_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                keys[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        misses = [
+            name for name, key in keys.items()
+            if name not in cache or cache[name][0] != key
         ]
-        return experiments
+        if len(misses) > 0:
+            # decoding is CPU bound for large files, use processes for those
+            if sum(keys[name][1] for name in misses) >= PROCESS_POOL_MIN_BYTES:
+                executor = ProcessPoolExecutor()
+            else:
+                executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+            file_paths = [os.path.join(metadata_dir, name) for name in misses]
+            with executor:
+                for name, record in zip(misses, executor.map(load_record, file_paths)):
+                    cache[name] = keys[name], record
+
+        # also forgets the experiments which were deleted
+        dirty = len(misses) > 0 or len(cache) != len(keys)
+        cache = {name: cache[name] for name in keys}
+        if dirty:
+            save_cache(cache_path, cache)
+        return [Experiment.from_record(record) for _, record in cache.values()]
 
     def get_experiment(self, expe_partial_id):
-        experiment_files = self._get_experiments_files()
-        experiment_files= list(filter(lambda f: os.path.basename(f).startswith(expe_partial_id), experiment_files))
-        n_expe = len(experiment_files)
-        if n_expe >= 2:
-            raise Exception(f"Found {n_expe} experiments with id '{expe_partial_id}'")
-        if n_expe == 0:
+        experiment_file = None
+        with os.scandir(self._get_metadata_dir()) as entries:
+            for entry in entries:
+                if not entry.name.startswith(expe_partial_id) or not entry.is_file():
+                    continue
+                if experiment_file is not None:
+                    raise Exception(f"Found several experiments with id '{expe_partial_id}'")
+                experiment_file = entry.path
+        if experiment_file is None:
             raise KeyError(expe_partial_id)
-        return Experiment.from_file(experiment_files[0])
+        return Experiment.from_file(experiment_file)
 
     @staticmethod
     def _get_location():
-        with open("keepsake.yml") as f:
-            lines = f.readlines()
-        for line in lines:
+        config = load_keepsake_config()
+        location = config.get("repository")
+        if location is None:
+            raise Exception(f"repository not found in {KEEPSAKE_CONFIG}")
+        assert location.startswith("file://")
+        return Path(location[7:])
+
+
+def load_keepsake_config():
+    # imported here, PyYAML is only needed for this single read
+    try:
+        import yaml
+    except ImportError:
+        yaml = None
+
+    with open(KEEPSAKE_CONFIG) as f:
+        if yaml is not None:
+            return yaml.safe_load(f) or {}
+
+        config = {}
+        for line in f:
             if line.startswith("repository:"):
-                _, location, _ = line.split('"')
-                assert location.startswith("file://")
-                return Path(location[7:])
-        raise Exception("repository not found in keepsake.yml")
+                _, config["repository"], _ = line.split('"')
+        return config
+
+
+def get_cache_path(metadata_dir):
+    # one cache per repository, so that a run only loads its own experiments
+    digest = hashlib.sha1(metadata_dir.encode()).hexdigest()
+    return CACHE_DIR / f"{digest}.pkl"
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(cache_path, cache):
+    # write to a temporary file first so that concurrent runs never
+    # read a partially written cache
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 
 def try_fallback(func, default_val):
@@ -191,24 +414,37 @@ def try_fallback(func, default_val):
         return default_val
 
 
+def parse_date(value):
+    return parser.parse(value, parserinfo=parser.parserinfo(dayfirst=True))
+
+
 class Filter:
     def __init__(self, comp, field, value):
         self.comp = comp
-        self.field = field
+        self.field = sys.intern(field)
         self.value = value
+        self._coerced = {}
+        if field == "created":
+            self.value = try_fallback(parse_date, value)
 
     def __call__(self, expe):
+        return self.test(self.get_value(expe))
+
+    def get_value(self, expe):
+        if self.field == "created":
+            return expe.created
+        if self.field == "n_checkpoints":
+            return expe.n_checkpoints
+        return expe.get_field(self.field)
+
+    def test(self, field):
         if self.field == "created":
-            field = expe.created
-            convert_func = partial(parser.parse, parserinfo=parser.parserinfo(dayfirst=True))
+            comp_value = self.value
         elif self.field == "n_checkpoints":
-            field = len(expe.checkpoints) if expe.checkpoints is not None else 0
-            convert_func = int
+            comp_value = self._coerce(int)
         else:
-            field = expe.get_field(self.field)
-            convert_func = type(field)
+            comp_value = self._coerce(type(field))
 
-        comp_value = try_fallback(convert_func, self.value)
         try:
             res = self.comp(field, comp_value) 
         except:
@@ -216,89 +452,159 @@ class Filter:
 
         return res
 
+    def _coerce(self, convert_func):
+        if convert_func not in self._coerced:
+            self._coerced[convert_func] = try_fallback(convert_func, self.value)
+        return self._coerced[convert_func]
+
+    def cost(self, param_fields):
+        # equalities reject the most experiments, inequalities the least
+        selectivity = SELECTIVITY.get(self.comp, 1)
+        if self.field in ("created", "n_checkpoints"):
+            return 0, selectivity
+        if self.field in param_fields:
+            return 1, selectivity
+        # metric fields may need a scan over the checkpoints
+        return 2, selectivity
+
+
+def filter_cost(filter, param_fields):
+    if isinstance(filter, Filter):
+        return filter.cost(param_fields)
+    return 3, 0
+
+
+FILTER_RE = re.compile(r"\s*([^<>=!]+?)\s*(<=|>=|!=|<|>|=)\s*([^<>=][^=]*?)?\s*")
+IN_FILTER_RE = re.compile(r"\s*(.+?)\s+in\s+(.+?)\s*")
+COMPARATORS = {
+    "!=": operator.ne,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "=": operator.eq,
+    ">": operator.gt,
+}
+SELECTIVITY = {operator.eq: 0, operator.ne: 2}
+
 
 def compile_filter(format):
     if " or " in format:
-        lhs_format, rhs_format = format.split(" or ")
+        lhs_format, rhs_format = format.split(" or ", 1)
         lhs, rhs = compile_filter(lhs_format), compile_filter(rhs_format)
         return lambda expe: lhs(expe) or rhs(expe)
 
-    if " in " in format:
-        value, field = format.split(" in ")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: b in a, field, value)
-
-    if "!=" in format:
-        field, value = format.split("!=")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a != b, field, value)
-
-    if "<=" in format:
-        field, value = format.split("<=")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a <= b, field, value)
-    
-    if ">=" in format:
-        field, value = format.split(">=")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a >= b, field, value)
-
-    if "<" in format:
-        field, value = format.split("<")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a < b, field, value)
-
-    if "=" in format:
-        field, value = format.split("=")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a == b, field, value)
-
-    if ">" in format:
-        field, value = format.split(">")
-        field, value = field.strip(), value.strip()
-        return Filter(lambda a, b: a > b, field, value)
+    match = IN_FILTER_RE.fullmatch(format)
+    if match is not None:
+        value, field = match.groups()
+        return Filter(operator.contains, field, value)
+
+    match = FILTER_RE.fullmatch(format)
+    if match is not None:
+        field, op, value = match.groups()
+        return Filter(COMPARATORS[op], field, value or "")
 
     raise Exception(f"invalid filter format '{format}'")
 
 
+def compile_filters(formats, param_fields):
+    # run the cheapest filters first so that rejected experiments
+    # do not pay for the checkpoint scans of the other ones
+    filters = sorted(
+        (compile_filter(format) for format in formats),
+        key=lambda filter: filter_cost(filter, param_fields),
+    )
+
+    # group the filters on a same field to look it up once per experiment
+    fields = {}
+    compounds = []
+    for filter in filters:
+        if isinstance(filter, Filter):
+            fields.setdefault(filter.field, []).append(filter)
+        else:
+            compounds.append(filter)
+    groups = tuple(
+        (field_filters[0].get_value, tuple(field_filters))
+        for field_filters in fields.values()
+    )
+    compounds = tuple(compounds)
+
+    def matches(expe):
+        for get_value, field_filters in groups:
+            value = get_value(expe)
+            for filter in field_filters:
+                if not filter.test(value):
+                    return False
+        for compound in compounds:
+            if not compound(expe):
+                return False
+        return True
+
+    return matches
+
+
 def list_experiments(args):
     repo = KeepsakeRepository()
     experiments = repo.get_experiments()
 
-    filters = [compile_filter(raw_filter) for raw_filter in args.filter]
-    experiments = [
-        expe for expe in experiments if all(filter(expe) for filter in filters)
-    ]
+    if len(args.filter) > 0:
+        param_fields = set()
+        for expe in experiments:
+            param_fields.update(expe.params.keys())
+        matches = compile_filters(args.filter, param_fields)
+        experiments = [expe for expe in experiments if matches(expe)]
+
     if args.sort is not None:
-        experiments = sorted(experiments, key=lambda expe: expe.get_field(args.sort, 0.0))
+        def sort_key(expe):
+            # experiments where the field is null are listed last
+            value = expe.get_field(args.sort, 0.0)
+            return value is None, value
+    else:
+        sort_key = lambda expe: expe.created
+    if args.limit is not None:
+        experiments = heapq.nsmallest(args.limit, experiments, key=sort_key)
     else:
-        experiments = sorted(experiments, key=lambda expe: expe.created)
+        experiments = sorted(experiments, key=sort_key)
 
     if args.quiet:
         for experiment in experiments:
             print(experiment.id)
         return
 
+    select = None if args.select is None else frozenset(args.select)
+    if not sys.stdout.isatty():
+        # plain tab separated rows when piped, no need to lay out a table
+        for expe in experiments:
+            print("\t".join([
+                expe.id,
+                expe.created.isoformat(),
+                expe.get_params(select).replace("\n", ", "),
+                expe.get_metrics(select).replace("\n", ", "),
+            ]))
+        return
+
+    rows = [
+        (
+            expe.id[:7],
+            expe.created.strftime("%H:%M\n%D"),
+            expe.get_params(select),
+            expe.get_metrics(select),
+        )
+        for expe in experiments
+    ]
+
     table = Table(title="Experiments", box=box.ROUNDED)
     table.add_column("id", justify="center")
     table.add_column("Created", justify="center")
     table.add_column("Parameters")
     table.add_column("Checkpoints")
+    for row in rows:
+        table.add_row(*row)
 
-    for expe in experiments:
-        table.add_row(
-            expe.id[:7],
-            expe.created.strftime("%H:%M\n%D"),
-            expe.get_params(args.select),
-            expe.get_metrics(args.select),
-        )
-
-    console = Console()
     if len(experiments) > 5:
-        with console.pager():
-            console.print(table)
+        with LIST_CONSOLE.pager():
+            LIST_CONSOLE.print(table)
     else:
-        console.print(table)
+        LIST_CONSOLE.print(table)
 
 
 def show_experiment(args):
@@ -370,7 +676,10 @@ def reproduce_experiment(args):
             console.print("Aborting")
             return
 
-    os.system(command)
+    # replace sake with the experiment instead of going through a shell
+    argv = shlex.split(command)
+    sys.stdout.flush()
+    os.execvp(argv[0], argv)
 
 
 def parse_args():
@@ -378,10 +687,13 @@ def parse_args():
     commands = parser.add_subparsers()
 
     ls = commands.add_parser("list", aliases=["ls"])
-    ls.add_argument("-f", "--filter", default=[], action="append")
-    ls.add_argument("-s", "--select", action="append")
+    ls.add_argument("-f", "--filter", default=[], action="extend", nargs="+",
+                    help="only list the experiments matching all the filters")
+    ls.add_argument("-s", "--select", action="extend", nargs="+",
+                    help="only show these params and metrics")
     ls.add_argument("-q", "--quiet", action="store_true", help="return only the ids")
     ls.add_argument("--sort")
+    ls.add_argument("-n", "--limit", type=int, help="show only the first experiments")
     ls.set_defaults(func=list_experiments)
 
     show = commands.add_parser("show")